@@ -0,0 +1,129 @@
+"""
+Helpers shared by build_data.py and build_metrics.py.
+
+Both scripts are run as `python scripts/<name>.py`, so this module is importable
+as a top-level `_toc_common` from either of them.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Dict, Iterator
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+
+try:
+    import orjson  # optional C-accelerated JSON; stdlib json is the fallback
+except ImportError:
+    orjson = None
+
+
+# Transient 429/5xx answers are retried with exponential backoff (0.5s, 1s, 2s, ...),
+# honouring Retry-After; POST is included because batched ESearch is a POST
+_RETRY_OPTIONS: Dict[str, Any] = dict(
+    total=5,
+    backoff_factor=0.5,
+    status_forcelist=[429, 500, 502, 503, 504],
+    respect_retry_after_header=True,
+    allowed_methods=frozenset({"GET", "POST"}),
+)
+try:
+    RETRY = Retry(backoff_jitter=0.3, **_RETRY_OPTIONS)
+except TypeError:  # urllib3 < 2 has no backoff_jitter
+    RETRY = Retry(**_RETRY_OPTIONS)
+
+
+def make_session(user_agent: str, pool_maxsize: int = 10) -> requests.Session:
+    """
+    Pooled keep-alive session (no per-call TCP/TLS handshake) with RETRY mounted
+    for https and the given User-Agent on every request.
+    """
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=RETRY))
+    # Advertise every content-encoding urllib3 can decode here (gzip/deflate, plus br/zstd when installed)
+    session.headers.update({"User-Agent": user_agent, "Accept-Encoding": ACCEPT_ENCODING})
+    return session
+
+
+def iso_now() -> str:
+    return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+
+
+def json_loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps_pretty(obj: Any) -> bytes:
+    """
+    UTF-8, 2-space indented JSON. orjson and the stdlib fallback produce the same bytes.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+
+
+def json_dumps_compact(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+@contextmanager
+def open_atomic(path: str) -> Iterator[BinaryIO]:
+    """
+    Binary handle on a sibling temp file that is os.replace()d over `path` on success,
+    so an interrupted or failed run never leaves a truncated file behind (the old one stays).
+    """
+    tmp = f"{path}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            yield f
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def write_bytes_atomic(path: str, data: bytes) -> None:
+    with open_atomic(path) as f:
+        f.write(data)
+
+
+# ISSN shapes normalize_issn accepts (compiled once; it runs for every ISSN in the SJR CSV)
+_ISSN_HYPHENATED = re.compile(r"\d{4}-\d{3}[\dX]")
+_ISSN_PLAIN = re.compile(r"\d{7}[\dX]")
+
+
+def normalize_issn(raw: str) -> str:
+    """
+    Normalize ISSN into ####-#### uppercase.
+    Accepts with/without hyphen.
+    """
+    s = (raw or "").strip().upper().replace(" ", "")
+    s = s.replace("–", "-")
+    if _ISSN_HYPHENATED.fullmatch(s):
+        return s
+    if _ISSN_PLAIN.fullmatch(s):
+        return s[:4] + "-" + s[4:]
+    return s
+
+
+def source_issn(source: Dict[str, Any]) -> str:
+    """
+    The normalized ISSN a sources.json entry is queried by: "issn" may be a string
+    or a list (first entry wins); "" when missing.
+    """
+    issn = source.get("issn") or ""
+    if isinstance(issn, list):
+        issn = issn[0] if issn else ""
+    return normalize_issn(str(issn))
@@ -22,41 +22,101 @@ Output fields added:
 
 from __future__ import annotations
 
-import json
 import os
 import re
 import sys
+import threading
 import time
-from datetime import datetime, timezone, date as _date
-from typing import Any, Dict, List, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import timedelta, date as _date
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
-import requests
 from xml.etree import ElementTree as ET
 
+from _toc_common import (
+    iso_now,
+    json_dumps_compact,
+    json_dumps_pretty,
+    json_loads,
+    make_session,
+    open_atomic,
+    source_issn,
+    write_bytes_atomic,
+)
+
 
 CROSSREF_API = "https://api.crossref.org/works"
 NCBI_ESEARCH = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/esearch.fcgi"
 NCBI_EFETCH = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils/efetch.fcgi"
 
+# Only the work fields to_item reads; skips references, abstracts, funders, licenses, ...
+CROSSREF_SELECT_FIELDS = (
+    "DOI",
+    "URL",
+    "type",
+    "title",
+    "author",
+    "published-online",
+    "published-print",
+    "issued",
+    "created",
+    "indexed",
+    "deposited",
+)
+
 USER_AGENT = os.getenv(
     "CROSSREF_UA",
     "AnesTOC-Dashboard/1.0 (mailto:example@example.com)",
 )
 
+# Crossref etiquette: a mailto routes requests to the polite pool; Plus subscribers
+# can pass their token (sent to Crossref only, never to NCBI)
+CROSSREF_MAILTO = os.getenv("CROSSREF_MAILTO", "")
+CROSSREF_PLUS_API_TOKEN = os.getenv("CROSSREF_PLUS_API_TOKEN", "")
+
 NCBI_EMAIL = os.getenv("NCBI_EMAIL", "")
+# Optional NCBI API key: raises the E-utilities limit from 3 to 10 requests/second
+NCBI_API_KEY = os.getenv("NCBI_API_KEY", "")
 
 # How many recent works to fetch per journal from Crossref
 CROSSREF_ROWS_PER_JOURNAL = int(os.getenv("CROSSREF_ROWS_PER_JOURNAL", "200"))
+# Incremental Crossref builds: reuse the previous data.json and only ask Crossref for
+# works of each journal's current publication window (re)indexed since its last run;
+# a full rebuild runs every CROSSREF_FULL_REFRESH_DAYS (or whenever there is no usable previous build)
+CROSSREF_INCREMENTAL = os.getenv("CROSSREF_INCREMENTAL", "1") == "1"
+CROSSREF_FULL_REFRESH_DAYS = int(os.getenv("CROSSREF_FULL_REFRESH_DAYS", "7"))
+# Concurrent Crossref requests (kept small for Crossref's polite pool and the session pool size);
+# CROSSREF_WORKERS=1 fetches journals one after another, e.g. to compare against the parallel run
+CROSSREF_MAX_WORKERS = max(1, int(os.getenv("CROSSREF_WORKERS", "8")))
 # Hard cap on total items written to data.json (after dedupe and sorting)
 GLOBAL_MAX_ITEMS = int(os.getenv("GLOBAL_MAX_ITEMS", "3000"))
+# Also write data.ndjson (one item per line) + data.meta.json for streaming consumers;
+# the dashboard itself only reads data.json
+DATA_NDJSON = os.getenv("DATA_NDJSON", "0") == "1"
 
+# PubMed enrichment on/off ("0" skips NCBI and the PubMed cache entirely)
+ENABLE_PUBMED = os.getenv("ENABLE_PUBMED", "1") == "1"
 # PubMed DOI->PMID lookups budget (avoid hammering NCBI)
 PMID_LOOKUP_BUDGET = int(os.getenv("PMID_LOOKUP_BUDGET", "120"))
-PMID_SLEEP_SECONDS = float(os.getenv("PMID_SLEEP_SECONDS", "0.34"))
+PMID_SLEEP_SECONDS = float(os.getenv("PMID_SLEEP_SECONDS", "0.11" if NCBI_API_KEY else "0.34"))
+# Crossref work types PubMed never indexes; their DOIs are not looked up
+NON_PUBMED_CROSSREF_TYPES = frozenset({"posted-content", "peer-review", "grant", "dataset", "component"})
+# DOIs per ESearch request (OR'd [doi] terms)
+ESEARCH_BATCH_SIZE = int(os.getenv("ESEARCH_BATCH_SIZE", "100"))
 
-# PubMed efetch batching (publication types)
+# PubMed efetch page size when reading back an ESearch history result set
 EFETCH_BATCH_SIZE = int(os.getenv("EFETCH_BATCH_SIZE", "100"))
-EFETCH_SLEEP_SECONDS = float(os.getenv("EFETCH_SLEEP_SECONDS", "0.34"))
+EFETCH_SLEEP_SECONDS = float(os.getenv("EFETCH_SLEEP_SECONDS", "0.11" if NCBI_API_KEY else "0.34"))
+# DOI chunks resolved concurrently; NCBI_LIMITER still spaces every request start
+PUBMED_MAX_WORKERS = max(1, int(os.getenv("PUBMED_WORKERS", "3")))
+
+# On-disk PubMed cache (DOI -> PMID + publication types), reused across runs
+PUBMED_CACHE_FILE = os.getenv("PUBMED_CACHE_FILE", "pubmed_cache.json")
+PUBMED_CACHE_TTL_DAYS = int(os.getenv("PUBMED_CACHE_TTL_DAYS", "30"))
+# DOIs PubMed did not know yet are retried sooner: new articles get indexed within days/weeks
+PUBMED_CACHE_NEGATIVE_TTL_DAYS = int(os.getenv("PUBMED_CACHE_NEGATIVE_TTL_DAYS", "7"))
 
 # Dashboard categories (requested consolidated schema)
 CAT_META = "Meta-analysis"
@@ -70,17 +130,69 @@ CAT_UNK = "Unclassified"
 DASHBOARD_CATEGORIES = [CAT_META, CAT_RCT, CAT_OBS, CAT_GUIDE, CAT_REVIEW, CAT_EDITORIAL]
 
 
-def iso_now() -> str:
-    return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
+# One pooled session for every Crossref/NCBI call (keep-alive, retries on transient 429/5xx)
+SESSION = make_session(USER_AGENT, pool_maxsize=20)
+
+
+class RateLimiter:
+    """
+    Thread-safe spacing between request starts, shared by all PubMed workers so
+    concurrent chunks still respect NCBI's requests-per-second cap.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self, interval: float) -> None:
+        # Reserve the next free slot, then keep `interval` seconds before the one after it
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+NCBI_LIMITER = RateLimiter()
+
+
+def _indent_json(chunk: bytes, prefix: bytes) -> bytes:
+    # Re-indent a pretty-printed value nested one level deeper (first line excluded);
+    # JSON strings never contain raw newlines, so splitting on them is safe
+    return chunk.replace(b"\n", b"\n" + prefix)
+
+
+def write_data_json(path: str, generated_at: str, items: Iterable[Dict[str, Any]], meta: Dict[str, Any]) -> None:
+    """
+    Stream data.json to disk one item at a time instead of serializing the whole
+    document at once. Output is byte-identical to json_dumps_pretty() of
+    {"generated_at", "items", "meta"}; the file is only replaced once fully written.
+    """
+    with open_atomic(path) as f:
+        f.write(b'{\n  "generated_at": ' + json_dumps_pretty(generated_at) + b',\n  "items": [')
+        n = 0
+        for it in items:
+            f.write(b",\n    " if n else b"\n    ")
+            f.write(_indent_json(json_dumps_pretty(it), b"    "))
+            n += 1
+        f.write(b"\n  ],\n" if n else b"],\n")
+        f.write(b'  "meta": ' + _indent_json(json_dumps_pretty(meta), b"  ") + b"\n}")
+
+
+def write_data_ndjson(path: str, items: Iterable[Dict[str, Any]]) -> None:
+    """
+    One compact JSON item per line, so readers can process records one at a time
+    instead of loading the whole data.json array.
+    """
+    with open_atomic(path) as f:
+        for it in items:
+            f.write(json_dumps_compact(it))
+            f.write(b"\n")
 
 
-def safe_get(d: Dict[str, Any], path: List[str], default=None):
-    cur: Any = d
-    for p in path:
-        if not isinstance(cur, dict) or p not in cur:
-            return default
-        cur = cur[p]
-    return cur
+def normalize_doi(doi: str) -> str:
+    return doi.strip().lower()
 
 
 def join_authors(item: Dict[str, Any]) -> str:
@@ -104,52 +216,79 @@ def clean_title(item: Dict[str, Any]) -> str:
     t = item.get("title") or []
     if not t:
         return ""
-    return re.sub(r"\s+", " ", t[0]).strip()
+    # str.split() collapses the same (Unicode) whitespace runs as \s+ and strips the ends
+    return " ".join((t[0] or "").split())
 
 
-def extract_ymd(item: Dict[str, Any], field: str) -> Optional[str]:
-    parts = safe_get(item, [field, "date-parts"])
-    if not (isinstance(parts, list) and parts and isinstance(parts[0], list)):
-        return None
+YMD = Tuple[int, int, int]
+
+
+def extract_ymd(item: Dict[str, Any], field: str) -> Optional[YMD]:
+    """
+    Crossref date-parts as a (year, month, day) tuple; tuples compare like the ISO dates they format to.
+    """
+    # EAFP: the common well-formed case is straight lookups; anything malformed
+    # (missing field, non-dict/list nodes, empty or None parts) lands in except
     try:
-        y = parts[0][0]
-        m = parts[0][1] if len(parts[0]) >= 2 else 1
-        d = parts[0][2] if len(parts[0]) >= 3 else 1
-        return f"{int(y):04d}-{int(m):02d}-{int(d):02d}"
-    except Exception:
+        # Missing month/day default to 1
+        y, m, d = (item[field]["date-parts"][0] + [1, 1])[:3]
+        return int(y), int(m), int(d)
+    except (KeyError, IndexError, TypeError, ValueError):
         return None
 
 
-def pick_date(item: Dict[str, Any]) -> Optional[str]:
+def format_ymd(ymd: YMD) -> str:
+    return f"{ymd[0]:04d}-{ymd[1]:02d}-{ymd[2]:02d}"
+
+
+# "Today" is fixed for the whole run; computed once rather than per item
+TODAY_YMD: YMD = tuple(_date.today().timetuple()[:3])
+
+# Crossref date fields considered for the publication date
+DATE_FIELDS = (
+    "published-online",
+    "published-print",
+    "issued",
+    "created",
+    "indexed",
+    "deposited",
+)
+
+
+def pick_date_from(dates: Dict[str, Optional[YMD]], today: YMD = TODAY_YMD) -> Optional[str]:
     """
     Choose a sensible publication date and avoid future 'issue/cover' dates.
+    `dates` maps each DATE_FIELDS name to its parsed (y, m, d) (or None).
+    One scan keeps the latest non-future date and the earliest future one;
+    only the winner is formatted.
     """
-    fields = [
-        "published-online",
-        "published-print",
-        "issued",
-        "created",
-        "indexed",
-        "deposited",
-    ]
-
-    candidates: List[str] = []
-    for f in fields:
-        ymd = extract_ymd(item, f)
-        if ymd:
-            candidates.append(ymd)
-
-    if not candidates:
-        return None
+    latest_past: Optional[YMD] = None
+    earliest_future: Optional[YMD] = None
+    for ymd in dates.values():
+        if ymd is None:
+            continue
+        if ymd <= today:
+            if latest_past is None or ymd > latest_past:
+                latest_past = ymd
+        elif earliest_future is None or ymd < earliest_future:
+            earliest_future = ymd
 
-    today = _date.today().isoformat()
-    non_future = [c for c in candidates if c <= today]
+    # if everything is in the future, pick earliest (still consistent)
+    chosen = latest_past or earliest_future
+    return format_ymd(chosen) if chosen else None
 
-    if non_future:
-        return max(non_future)
 
-    # if everything is in the future, pick earliest (still consistent)
-    return min(candidates)
+def crossref_get(params: Dict[str, str]) -> Dict[str, Any]:
+    """
+    GET /works with the shared etiquette parameters; returns the response "message".
+    """
+    params = dict(params, select=",".join(CROSSREF_SELECT_FIELDS))
+    if CROSSREF_MAILTO:
+        params["mailto"] = CROSSREF_MAILTO
+    headers = {"Crossref-Plus-API-Token": f"Bearer {CROSSREF_PLUS_API_TOKEN}"} if CROSSREF_PLUS_API_TOKEN else None
+    r = SESSION.get(CROSSREF_API, params=params, headers=headers, timeout=45)
+    r.raise_for_status()
+    return json_loads(r.content).get("message", {}) or {}
 
 
 def crossref_query_by_issn(issn: str, rows: int) -> List[Dict[str, Any]]:
@@ -163,77 +302,237 @@ def crossref_query_by_issn(issn: str, rows: int) -> List[Dict[str, Any]]:
         "order": "desc",
         "rows": str(rows),
     }
-    headers = {"User-Agent": USER_AGENT}
-    r = requests.get(CROSSREF_API, params=params, headers=headers, timeout=45)
-    r.raise_for_status()
-    return r.json().get("message", {}).get("items", []) or []
+    return crossref_get(params).get("items", []) or []
 
 
-def doi_to_pmid(doi: str) -> Optional[str]:
-    if not doi:
-        return None
+def crossref_query_since(issn: str, since: str, window: str, rows: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    Works published on or after `window` (the journal's current window) that Crossref
+    (re)indexed on or after `since` (both YYYY-MM-DD), in a single page. Re-indexing of
+    older works is constant, so without the window they would flood in (and, dated by
+    their fresh "indexed" stamp, push real new articles out). Returns None when the page
+    is full: more changed than a full fetch returns, so the caller does that instead.
+    """
+    rows = max(1, min(int(rows), 1000))
+    params = {
+        "filter": f"issn:{issn},from-index-date:{since},from-pub-date:{window}",
+        "rows": str(rows),
+    }
+    items = crossref_get(params).get("items", []) or []
+    return items if len(items) < rows else None
+
+
+def fetch_journal_works(issn: str, since: Optional[str], window: Optional[str]) -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Works for one journal and whether they are an incremental delta (True) or the full
+    newest-CROSSREF_ROWS_PER_JOURNAL fetch (False). At most one page either way,
+    unless a full incremental page falls back to the full fetch.
+    """
+    if since and window:
+        works = crossref_query_since(issn, since, window, CROSSREF_ROWS_PER_JOURNAL)
+        if works is not None:
+            return works, True
+    return crossref_query_by_issn(issn, CROSSREF_ROWS_PER_JOURNAL), False
+
+
+def esearch_dois_history(dois: List[str]) -> Tuple[str, str, int]:
+    """
+    One ESearch for a chunk of DOIs (OR'd [doi] terms) posted to the NCBI
+    history server. Returns (WebEnv, query_key, count) for a follow-up EFetch.
+    """
     params = {
         "db": "pubmed",
-        "term": f"{doi}[doi]",
+        "term": " OR ".join(f'"{d}"[doi]' for d in dois),
         "retmode": "json",
+        "retmax": "0",
+        "usehistory": "y",
         "tool": "AnesTOC-Dashboard",
     }
     if NCBI_EMAIL:
         params["email"] = NCBI_EMAIL
-    headers = {"User-Agent": USER_AGENT}
-    r = requests.get(NCBI_ESEARCH, params=params, headers=headers, timeout=45)
+    if NCBI_API_KEY:
+        params["api_key"] = NCBI_API_KEY
+    # POST: 100 OR'd DOI terms can push a GET past URL length limits
+    r = SESSION.post(NCBI_ESEARCH, data=params, timeout=45)
     r.raise_for_status()
-    ids = r.json().get("esearchresult", {}).get("idlist", [])
-    return ids[0] if ids else None
+    res = json_loads(r.content).get("esearchresult", {}) or {}
+    # NCBI reports backend failures as HTTP 200 + "ERROR": raise, so the chunk counts as
+    # failed (not cached) instead of every DOI reading as "not in PubMed"
+    if "ERROR" in res or "count" not in res:
+        raise ValueError(f"ESearch failed: {res.get('ERROR') or 'no count in response'}")
+    count = int(res["count"])
+    if count and not (res.get("webenv") and res.get("querykey")):
+        raise ValueError("ESearch matched but returned no history WebEnv/query_key")
+    return res.get("webenv", ""), res.get("querykey", ""), count
+
+
+def efetch_publication_types_history(webenv: str, query_key: str, retstart: int, retmax: int) -> List[Tuple[str, str, List[str]]]:
+    """
+    EFetch (XML) a page of a history-server result set.
+    Returns (pmid, doi, publication types) per record; doi is normalized ("" if absent).
+    """
+    params = {
+        "db": "pubmed",
+        "WebEnv": webenv,
+        "query_key": query_key,
+        "retstart": str(retstart),
+        "retmax": str(retmax),
+        "retmode": "xml",
+        "rettype": "abstract",
+        "tool": "AnesTOC-Dashboard",
+    }
+    if NCBI_EMAIL:
+        params["email"] = NCBI_EMAIL
+    if NCBI_API_KEY:
+        params["api_key"] = NCBI_API_KEY
+
+    out: List[Tuple[str, str, List[str]]] = []
+
+    # Stream-parse the XML straight off the socket and drop each article once read,
+    # so memory stays at one record instead of the whole batch
+    with SESSION.get(NCBI_EFETCH, params=params, timeout=45, stream=True) as r:
+        r.raise_for_status()
+        r.raw.decode_content = True
+
+        for _event, elem in ET.iterparse(r.raw, events=("end",)):
+            # Paths are anchored at the article (no ".//"), so each lookup walks one branch
+            # instead of searching the whole record
+            if elem.tag == "PubmedArticle":
+                pmid_el = elem.find("MedlineCitation/PMID")
+                doi_el = elem.find("PubmedData/ArticleIdList/ArticleId[@IdType='doi']")
+                pt_els = elem.findall("MedlineCitation/Article/PublicationTypeList/PublicationType")
+            elif elem.tag == "PubmedBookArticle":
+                # Some responses can include PubmedBookArticle; include defensively
+                pmid_el = elem.find("BookDocument/PMID")
+                doi_el = elem.find("PubmedBookData/ArticleIdList/ArticleId[@IdType='doi']")
+                pt_els = elem.findall("BookDocument/PublicationTypeList/PublicationType")
+            else:
+                continue
+
+            if pmid_el is not None and pmid_el.text:
+                doi = normalize_doi(doi_el.text or "") if doi_el is not None else ""
+                pts = [pt.text.strip() for pt in pt_els if pt.text]
+                out.append((pmid_el.text.strip(), doi, pts))
+            elem.clear()
+
+    return out
 
 
-def efetch_publication_types(pmids: List[str]) -> Dict[str, List[str]]:
+def pubmed_lookup_chunk(dois: List[str]) -> Dict[str, Tuple[str, List[str]]]:
     """
-    Return mapping pmid -> list of PublicationType values using PubMed efetch (XML).
+    One ESearch on the history server + EFetch via WebEnv for a chunk of
+    normalized DOIs, so DOI, PMID and types all come back from the same XML pass.
+    Every DOI of the chunk is in the result; ("", []) means PubMed has no match.
     """
-    out: Dict[str, List[str]] = {}
-    if not pmids:
+    out: Dict[str, Tuple[str, List[str]]] = {d: ("", []) for d in dois}
+    page_size = max(1, min(EFETCH_BATCH_SIZE, 200))
+
+    NCBI_LIMITER.wait(PMID_SLEEP_SECONDS)
+    webenv, query_key, count = esearch_dois_history(dois)
+    if not count:
         return out
+    for start in range(0, count, page_size):
+        NCBI_LIMITER.wait(EFETCH_SLEEP_SECONDS)
+        for pmid, doi, pts in efetch_publication_types_history(webenv, query_key, start, page_size):
+            if doi in out:
+                out[doi] = (pmid, pts)
+    return out
+
 
+def pubmed_lookup_batch(dois: List[str]) -> Dict[str, Tuple[str, List[str]]]:
+    """
+    Resolve normalized DOIs to (PMID, publication types) in chunks of ESEARCH_BATCH_SIZE,
+    with chunks in flight concurrently. Returns mapping normalized DOI -> (pmid, types)
+    for every DOI actually checked (pmid "" = not in PubMed); DOIs of failed chunks are absent.
+    """
+    out: Dict[str, Tuple[str, List[str]]] = {}
+    batch_size = max(1, min(ESEARCH_BATCH_SIZE, 200))
+    chunks = [dois[i:i + batch_size] for i in range(0, len(dois), batch_size)]
+    if not chunks:
+        return out
+
+    with ThreadPoolExecutor(max_workers=min(PUBMED_MAX_WORKERS, len(chunks))) as pool:
+        futures = [(chunk, pool.submit(pubmed_lookup_chunk, chunk)) for chunk in chunks]
+        for chunk, fut in futures:
+            try:
+                out.update(fut.result())
+            except Exception as e:
+                print(f"[WARN] PubMed lookup failed for DOI batch starting {chunk[0]}: {e}", file=sys.stderr)
+
+    return out
+
+
+def pubmed_indexes_issn(issn: str) -> bool:
+    """
+    Whether PubMed has any record under this ISSN (one ESearch, no IDs returned).
+    """
     params = {
         "db": "pubmed",
-        "id": ",".join(pmids),
-        "retmode": "xml",
+        "term": f'"{issn}"[is]',
+        "retmode": "json",
+        "retmax": "0",
         "tool": "AnesTOC-Dashboard",
     }
     if NCBI_EMAIL:
         params["email"] = NCBI_EMAIL
-    headers = {"User-Agent": USER_AGENT}
-
-    r = requests.get(NCBI_EFETCH, params=params, headers=headers, timeout=45)
+    if NCBI_API_KEY:
+        params["api_key"] = NCBI_API_KEY
+    r = SESSION.get(NCBI_ESEARCH, params=params, timeout=45)
     r.raise_for_status()
+    res = json_loads(r.content).get("esearchresult", {}) or {}
+    if "ERROR" in res or "count" not in res:
+        raise ValueError(f"ESearch failed: {res.get('ERROR') or 'no count in response'}")
+    return int(res["count"]) > 0
 
-    root = ET.fromstring(r.text)
 
-    for art in root.findall(".//PubmedArticle"):
-        pmid_el = art.find(".//MedlineCitation/PMID")
-        if pmid_el is None or not pmid_el.text:
-            continue
-        pmid = pmid_el.text.strip()
-        pts = []
-        for pt in art.findall(".//MedlineCitation/Article/PublicationTypeList/PublicationType"):
-            if pt.text:
-                pts.append(pt.text.strip())
-        out[pmid] = pts
-
-    # Some responses can include PubmedBookArticle; include defensively
-    for art in root.findall(".//PubmedBookArticle"):
-        pmid_el = art.find(".//BookDocument/PMID")
-        if pmid_el is None or not pmid_el.text:
-            continue
-        pmid = pmid_el.text.strip()
-        pts = []
-        for pt in art.findall(".//BookDocument/PublicationTypeList/PublicationType"):
-            if pt.text:
-                pts.append(pt.text.strip())
-        out[pmid] = pts
+def issn_in_pubmed(issn: str, cache: Dict[str, Dict[str, Any]]) -> bool:
+    """
+    Per-ISSN "does PubMed index this journal" verdict, kept in the PubMed cache under
+    "issn:<ISSN>" (same fetched_at/TTL as DOI entries) and probed only on a cache miss.
+    A failed probe counts as indexed and is not cached.
+    """
+    key = f"issn:{issn}"
+    if key in cache:
+        return cache[key]["in_pubmed"]
+    NCBI_LIMITER.wait(PMID_SLEEP_SECONDS)
+    try:
+        found = pubmed_indexes_issn(issn)
+    except Exception as e:
+        print(f"[WARN] PubMed ISSN probe failed for {issn}: {e}", file=sys.stderr)
+        return True
+    cache[key] = {"in_pubmed": found, "fetched_at": int(time.time())}
+    return found
+
+
+def load_pubmed_cache(path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Read the DOI-keyed PubMed cache (plus "issn:<ISSN>" journal verdicts), dropping
+    entries older than PUBMED_CACHE_TTL_DAYS (PUBMED_CACHE_NEGATIVE_TTL_DAYS for "not in
+    PubMed" DOI entries, stored with pmid ""). A missing or unreadable cache is treated as empty.
+    """
+    try:
+        with open(path, "rb") as f:
+            cache = json_loads(f.read())
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"[WARN] Ignoring unreadable PubMed cache {path}: {e}", file=sys.stderr)
+        return {}
+
+    now = time.time()
+    oldest = now - PUBMED_CACHE_TTL_DAYS * 86400
+    oldest_negative = now - PUBMED_CACHE_NEGATIVE_TTL_DAYS * 86400
+    return {
+        key: entry for key, entry in cache.items()
+        if isinstance(entry, dict) and (
+            ("pmid" in entry and entry.get("fetched_at", 0) >= (oldest if entry["pmid"] else oldest_negative))
+            or ("in_pubmed" in entry and entry.get("fetched_at", 0) >= oldest)
+        )
+    }
 
-    return out
+
+def save_pubmed_cache(path: str, cache: Dict[str, Dict[str, Any]]) -> None:
+    write_bytes_atomic(path, json_dumps_compact(cache))
 
 
 # --------- classification ---------
@@ -294,36 +593,38 @@ TITLE_RULES: List[tuple[str, str]] = [
     (CAT_OBS, r"\bobservational\b|\bcohort\b|\bcase[- ]control\b|\bcross[- ]sectional\b|\bregistry\b"),
 ]
 
+# Compiled once at import. Rule order is the priority order, so a title matching
+# several rules still gets the first one; the union only short-circuits no-match titles.
+_TITLE_RULES_COMPILED = [(cat, re.compile(pattern, re.IGNORECASE)) for cat, pattern in TITLE_RULES]
+_TITLE_ANY_RULE = re.compile("|".join(f"(?:{pattern})" for _, pattern in TITLE_RULES), re.IGNORECASE)
 
-def category_from_pubmed_types(pub_types: List[str]) -> Optional[str]:
-    if not pub_types:
-        return None
 
-    # Direct mapping with precedence by importance
-    # Meta > RCT > Guide > Review > Editorial > Observational
-    precedence = [CAT_META, CAT_RCT, CAT_GUIDE, CAT_REVIEW, CAT_EDITORIAL, CAT_OBS]
+# Title-rule categories reliable enough that PubMed rarely changes the outcome
+CONFIDENT_TITLE_CATEGORIES = {CAT_META, CAT_GUIDE, CAT_EDITORIAL}
 
-    mapped: List[str] = []
-    for pt in pub_types:
-        cat = PUBMED_TYPE_TO_CATEGORY.get(pt)
-        if cat:
-            mapped.append(cat)
 
-    if not mapped:
-        return None
+# Direct mapping with precedence by importance
+# Meta > RCT > Guide > Review > Editorial > Observational
+_PRECEDENCE_RANK = {
+    cat: rank
+    for rank, cat in enumerate([CAT_META, CAT_RCT, CAT_GUIDE, CAT_REVIEW, CAT_EDITORIAL, CAT_OBS])
+}
+# Publication type -> (rank, category), so picking the winner is one lookup per type plus a tuple min
+_PT_RANKED = {pt: (_PRECEDENCE_RANK[cat], cat) for pt, cat in PUBMED_TYPE_TO_CATEGORY.items()}
 
-    for cat in precedence:
-        if cat in mapped:
-            return cat
-    return mapped[0]
+
+def category_from_pubmed_types(pub_types: List[str]) -> Optional[str]:
+    if not pub_types:
+        return None
+    ranked = [_PT_RANKED[pt] for pt in pub_types if pt in _PT_RANKED]
+    return min(ranked)[1] if ranked else None
 
 
 def category_from_title(title: str) -> Optional[str]:
-    if not title:
+    if not title or not _TITLE_ANY_RULE.search(title):
         return None
-    t = title.lower()
-    for cat, pattern in TITLE_RULES:
-        if re.search(pattern, t, flags=re.IGNORECASE):
+    for cat, rx in _TITLE_RULES_COMPILED:
+        if rx.search(title):
             return cat
     return None
 
@@ -344,13 +645,92 @@ def choose_category(pub_types: Optional[List[str]], title: str) -> str:
 
 # --------- item assembly ---------
 
-def to_item(journal: str, short: str, raw: Dict[str, Any]) -> Dict[str, Any]:
+@dataclass(slots=True)
+class Item:
+    """
+    One article as written to data.json (field order = JSON key order).
+    """
+    journal: str
+    journal_short: str
+    title: str
+    authors: str
+    # ISO date, or "" when Crossref has no usable date (sorts last; the frontend treats it as unknown)
+    published: str
+    doi: str
+    url: str
+    aop: bool
+    source: str
+    # Stripped + lowercased DOI: the one key for dedupe, PubMed lookups and the PubMed cache (not written out)
+    doi_norm: str
+    # Crossref work type, e.g. "journal-article" (not written out; "" for items from a previous build)
+    crossref_type: str = ""
+    # Crossref's own publication date (earliest of print/online, else issued): what its
+    # "published" sort and from-pub-date filter use (not written out; None for previous-build items)
+    crossref_published: Optional[YMD] = None
+    # PubMed enrichment fields (populated later if available)
+    pmid: Optional[str] = None
+    pubmed_url: Optional[str] = None
+    pubmed_publication_types: List[str] = field(default_factory=list)
+    category: Optional[str] = None
+
+    @property
+    def dedupe_key(self) -> str:
+        # Same work = same DOI; DOI-less records fall back to their URL ("" = cannot dedupe, dropped)
+        return self.doi_norm or self.url
+
+    def to_json(self) -> Dict[str, Any]:
+        out = {
+            "journal": self.journal,
+            "journal_short": self.journal_short,
+            "title": self.title,
+            "authors": self.authors,
+            "published": self.published,
+            "doi": self.doi,
+            "url": self.url,
+            "aop": self.aop,
+            "source": self.source,
+            "pmid": self.pmid,
+            "pubmed_url": self.pubmed_url,
+            "pubmed_publication_types": self.pubmed_publication_types,
+            "category": self.category,
+        }
+        # Normalize None fields (keep JSON clean)
+        if not self.pmid:
+            del out["pmid"]
+            del out["pubmed_url"]
+        return out
+
+    @classmethod
+    def from_json(cls, d: Dict[str, Any]) -> Item:
+        doi = d.get("doi") or ""
+        return cls(
+            journal=d["journal"],
+            journal_short=d.get("journal_short") or d["journal"],
+            title=d.get("title") or "",
+            authors=d.get("authors") or "",
+            published=d.get("published") or "",
+            doi=doi,
+            url=d.get("url") or "",
+            aop=bool(d.get("aop")),
+            source=d.get("source") or "crossref",
+            doi_norm=normalize_doi(doi),
+            pmid=d.get("pmid"),
+            pubmed_url=d.get("pubmed_url"),
+            pubmed_publication_types=d.get("pubmed_publication_types") or [],
+            category=d.get("category"),
+        )
+
+
+def to_item(journal: str, short: str, raw: Dict[str, Any]) -> Item:
     doi = raw.get("DOI", "") or ""
+    doi_norm = normalize_doi(doi)
     url = raw.get("URL") or (f"https://doi.org/{doi}" if doi else "")
 
-    online = extract_ymd(raw, "published-online")
-    pprint = extract_ymd(raw, "published-print")
-    issued = extract_ymd(raw, "issued")
+    # Parse every date field once; shared by the AOP check and pick_date_from
+    dates = {f: extract_ymd(raw, f) for f in DATE_FIELDS}
+    online = dates["published-online"]
+    pprint = dates["published-print"]
+    issued = dates["issued"]
 
     aop = False
     if online:
@@ -359,158 +739,281 @@ def to_item(journal: str, short: str, raw: Dict[str, Any]) -> Dict[str, Any]:
             aop = True
         elif min(later) > online:
             aop = True
+    printed_or_online = [d for d in (online, pprint) if d]
+
+    return Item(
+        journal=journal,
+        journal_short=short,
+        title=clean_title(raw),
+        authors=join_authors(raw),
+        published=pick_date_from(dates) or "",
+        doi=doi,
+        url=url,
+        aop=aop,
+        source="crossref",
+        doi_norm=doi_norm,
+        crossref_type=raw.get("type") or "",
+        crossref_published=min(printed_or_online) if printed_or_online else issued,
+    )
 
-    title = clean_title(raw)
 
-    return {
-        "journal": journal,
-        "journal_short": short,
-        "title": title,
-        "authors": join_authors(raw),
-        "published": pick_date(raw),
-        "doi": doi,
-        "url": url,
-        "aop": aop,
-        "source": "crossref",
-        # PubMed enrichment fields (populated later if available)
-        "pmid": None,
-        "pubmed_url": None,
-        "pubmed_publication_types": [],
-        "category": None,
-    }
+def fetch_journal_items(
+    journal: str, short: str, issn: str, since: Optional[str], window: Optional[str]
+) -> Tuple[List[Item], Optional[YMD], bool]:
+    """
+    Fetch one journal and project its works to Items inside the worker thread, so
+    each journal's raw Crossref dicts are released as soon as it finishes rather
+    than held until main() consumes results in sources.json order. Also returns
+    the newest "indexed" date seen (for the incremental state) and whether the fetch
+    was incremental. Untitled and key-less works are dropped.
+    """
+    items: List[Item] = []
+    newest: Optional[YMD] = None
+    # Repeats within this journal's results are skipped before to_item (same key as
+    # Item.dedupe_key); main() still dedupes across journals, first journal wins
+    seen = set()
+    works, incremental = fetch_journal_works(issn, since, window)
+    for raw in works:
+        ymd = extract_ymd(raw, "indexed")
+        if ymd and (newest is None or ymd > newest):
+            newest = ymd
+        key = normalize_doi(raw.get("DOI") or "") or raw.get("URL") or ""
+        if not key or key in seen:
+            continue
+        item = to_item(journal, short, raw)
+        if item.title:
+            items.append(item)
+            seen.add(key)
+    return items, newest, incremental
+
+
+def load_previous_build(path: str) -> Tuple[List[Item], Dict[str, str], Dict[str, str], Optional[str]]:
+    """
+    Items, per-ISSN Crossref index state, per-ISSN publication windows and last
+    full-build date from the previous data.json. Returns nothing usable (forcing a
+    full rebuild) when the file is missing/unreadable, predates incremental builds
+    (or windows), was built with other rows-per-journal / global-cap settings, or its
+    last full build is older than CROSSREF_FULL_REFRESH_DAYS.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = json_loads(f.read())
+    except FileNotFoundError:
+        return [], {}, {}, None
+    except Exception as e:
+        print(f"[WARN] Ignoring unreadable previous {path}: {e}", file=sys.stderr)
+        return [], {}, {}, None
+
+    meta = data.get("meta") or {}
+    state = meta.get("crossref_index_state") or {}
+    windows = meta.get("crossref_pub_window") or {}
+    full_build = meta.get("crossref_full_build")
+    if not (state and windows and full_build):
+        return [], {}, {}, None
+    if meta.get("rows_per_journal") != CROSSREF_ROWS_PER_JOURNAL or meta.get("global_max_items") != GLOBAL_MAX_ITEMS:
+        return [], {}, {}, None
+    if full_build < (_date.today() - timedelta(days=CROSSREF_FULL_REFRESH_DAYS)).isoformat():
+        return [], {}, {}, None
+
+    items = [Item.from_json(d) for d in data.get("items") or [] if isinstance(d, dict) and d.get("journal")]
+    return items, state, windows, full_build
 
 
 def main() -> int:
     root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
     sources_path = os.path.join(root, "sources.json")
     out_path = os.path.join(root, "data.json")
+    cache_path = os.path.join(root, PUBMED_CACHE_FILE)
 
-    with open(sources_path, "r", encoding="utf-8") as f:
-        sources = json.load(f)
-
-    unified: List[Dict[str, Any]] = []
+    with open(sources_path, "rb") as f:
+        sources = json_loads(f.read())
 
+    journals: List[tuple[str, str, str]] = []
+    # Journals marked "in_pubmed": false in sources.json never get PubMed lookups
+    not_in_pubmed = set()
     for s in sources:
         name = s["name"]
         short = s.get("short", name)
+        if not s.get("in_pubmed", True):
+            not_in_pubmed.add(name)
 
-        issn: Union[str, List[str]] = s.get("issn", "")
-        if isinstance(issn, list):
-            issn = issn[0] if issn else ""
-
+        issn = source_issn(s)
         if not issn:
             continue
-
-        try:
-            items = crossref_query_by_issn(str(issn), rows=CROSSREF_ROWS_PER_JOURNAL)
-        except Exception as e:
-            print(f"[WARN] Crossref failed for {name} ({issn}): {e}", file=sys.stderr)
-            continue
-
-        for raw in items:
-            item = to_item(name, short, raw)
-            if item["title"]:
-                unified.append(item)
-
-    # Deduplicate by DOI (fallback: URL)
-    seen = set()
-    deduped: List[Dict[str, Any]] = []
-    for it in unified:
-        key = (it.get("doi") or "").lower() or it.get("url") or ""
-        if not key:
-            continue
-        if key in seen:
-            continue
-        seen.add(key)
-        deduped.append(it)
-
-    # Sort by publication date desc
-    deduped.sort(
-        key=lambda x: (x.get("published") is not None, x.get("published") or ""),
-        reverse=True
-    )
-
-    # PubMed enrichment step 1: DOI -> PMID (budgeted)
-    pmids_to_fetch: List[str] = []
-    lookups = 0
-
+        journals.append((name, short, issn))
+
+    previous: List[Item] = []
+    index_state: Dict[str, str] = {}
+    pub_windows: Dict[str, str] = {}
+    full_build: Optional[str] = None
+    if CROSSREF_INCREMENTAL:
+        previous, index_state, pub_windows, full_build = load_previous_build(out_path)
+    if not previous:
+        index_state, pub_windows, full_build = {}, {}, _date.today().isoformat()
+    previous_journals = {it.journal for it in previous}
+
+    # Crossref queries are network-bound: keep several in flight, but consume
+    # results in sources.json order so dedupe/output stay deterministic.
+    # Deduplicate by DOI (fallback: URL) while ingesting: the first record per key wins and
+    # the dict keeps insertion order, so it is both the seen-set and the result list
+    by_key: Dict[str, Item] = {}
+    next_state: Dict[str, str] = {}
+    # Journals whose window carries over unchanged (fetched incrementally, or failed)
+    keep_window = set()
+
+    with ThreadPoolExecutor(max_workers=CROSSREF_MAX_WORKERS) as pool:
+        futures = []
+        for name, short, issn in journals:
+            # Incremental only for journals the previous build actually holds items for
+            since = index_state.get(issn) if name in previous_journals else None
+            window = pub_windows.get(issn)
+            futures.append((name, issn, since, pool.submit(fetch_journal_items, name, short, issn, since, window)))
+
+        for name, issn, since, fut in futures:
+            try:
+                items, newest, incremental = fut.result()
+            except Exception as e:
+                print(f"[WARN] Crossref failed for {name} ({issn}): {e}", file=sys.stderr)
+                # Previous items are kept; retry from the same point next run
+                if since:
+                    next_state[issn] = since
+                    keep_window.add(issn)
+                continue
+            if incremental:
+                keep_window.add(issn)
+
+            if newest:
+                next_state[issn] = format_ymd(min(newest, TODAY_YMD))
+            elif since:
+                next_state[issn] = since
+
+            for item in items:
+                key = item.dedupe_key
+                if key and key not in by_key:
+                    by_key[key] = item
+
+    # Carry over the previous build (fresh Crossref records win) for journals still in sources.json
+    shorts = {name: short for name, short, _ in journals}
+    for it in previous:
+        key = it.dedupe_key
+        if it.journal in shorts and key and key not in by_key:
+            it.journal_short = shorts[it.journal]
+            by_key[key] = it
+    deduped = list(by_key.values())
+
+    # Sort by publication date desc (undated "" items last)
+    deduped.sort(key=attrgetter("published"), reverse=True)
+
+    # Keep the newest CROSSREF_ROWS_PER_JOURNAL per journal (only bites when merging a previous build)
+    per_journal: Dict[str, int] = {}
+    capped: List[Item] = []
     for it in deduped:
-        if lookups >= PMID_LOOKUP_BUDGET:
-            break
-        doi = it.get("doi")
-        if not doi:
-            continue
+        n = per_journal.get(it.journal, 0)
+        if n < CROSSREF_ROWS_PER_JOURNAL:
+            capped.append(it)
+            per_journal[it.journal] = n + 1
+    deduped = capped
+
+    # Each journal's publication window = oldest Crossref publication date among the works a
+    # full fetch kept; incremental runs keep the window of the last full fetch (items carried
+    # over from data.json do not know their Crossref date), so it only moves on full fetches
+    oldest: Dict[str, YMD] = {}
+    for it in deduped:
+        ymd = it.crossref_published
+        if ymd and (it.journal not in oldest or ymd < oldest[it.journal]):
+            oldest[it.journal] = ymd
+    next_windows: Dict[str, str] = {}
+    for name, _, issn in journals:
+        if issn in keep_window and issn in pub_windows:
+            next_windows[issn] = pub_windows[issn]
+        elif name in oldest:
+            next_windows[issn] = format_ymd(oldest[name])
+
+    # PubMed enrichment: cached DOIs (including cached "not in PubMed" answers) are reused;
+    # only misses (up to budget) go to batched ESearch (history server) -> EFetch
+    pubmed: Dict[str, Tuple[str, List[str]]] = {}
+    if ENABLE_PUBMED:
+        cache = load_pubmed_cache(cache_path)
+        pubmed = {
+            doi: (entry["pmid"], entry.get("types") or []) for doi, entry in cache.items() if "pmid" in entry
+        }
+
+        # Spend the lookup budget on titles the heuristics cannot settle first; titles that
+        # already classify confidently only get whatever budget is left (stable sort keeps date order)
+        misses = [
+            it for it in deduped
+            if it.doi_norm and not it.pmid and it.doi_norm not in pubmed
+            and it.journal not in not_in_pubmed and it.crossref_type not in NON_PUBMED_CROSSREF_TYPES
+        ]
+
+        misses.sort(key=lambda it: category_from_title(it.title) in CONFIDENT_TITLE_CATEGORIES)
+
+        # Fill the budget in that order. A journal with no PMID anywhere in this build needs an
+        # "is it in PubMed" verdict (cached per ISSN) before its DOIs spend budget, so only
+        # journals that actually reach the budgeted slice are ever probed
+        with_pmid = {it.journal for it in deduped if it.pmid or pubmed.get(it.doi_norm, ("",))[0]}
+        issn_of = {name: issn for name, _, issn in journals}
+        indexed: Dict[str, bool] = {}
+        dois: List[str] = []
+        for it in misses:
+            if len(dois) >= PMID_LOOKUP_BUDGET:
+                break
+            if it.journal not in with_pmid:
+                if it.journal not in indexed:
+                    indexed[it.journal] = issn_in_pubmed(issn_of[it.journal], cache)
+                if not indexed[it.journal]:
+                    continue
+            dois.append(it.doi_norm)
+        fetched = pubmed_lookup_batch(dois)
+
+        now = int(time.time())
+        for doi, (pmid, pub_types) in fetched.items():
+            cache[doi] = {"pmid": pmid, "types": pub_types, "fetched_at": now}
+        pubmed.update(fetched)
+
         try:
-            pmid = doi_to_pmid(doi)
-            if pmid:
-                it["pmid"] = pmid
-                it["pubmed_url"] = f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/"
-                pmids_to_fetch.append(pmid)
-            lookups += 1
-            time.sleep(PMID_SLEEP_SECONDS)
+            save_pubmed_cache(cache_path, cache)
         except Exception as e:
-            print(f"[WARN] PubMed lookup failed for {doi}: {e}", file=sys.stderr)
-            lookups += 1
-            time.sleep(PMID_SLEEP_SECONDS)
-
-    # PubMed enrichment step 2: efetch Publication Types for collected PMIDs
-    pmid_to_types: Dict[str, List[str]] = {}
-    if pmids_to_fetch:
-        # De-duplicate while keeping order
-        seen_pm = set()
-        pmids_unique = []
-        for p in pmids_to_fetch:
-            if p not in seen_pm:
-                seen_pm.add(p)
-                pmids_unique.append(p)
-
-        batch_size = max(1, min(EFETCH_BATCH_SIZE, 200))
-        for i in range(0, len(pmids_unique), batch_size):
-            batch = pmids_unique[i:i + batch_size]
-            try:
-                got = efetch_publication_types(batch)
-                pmid_to_types.update(got)
-                time.sleep(EFETCH_SLEEP_SECONDS)
-            except Exception as e:
-                print(f"[WARN] PubMed efetch failed for PMIDs batch starting {batch[0]}: {e}", file=sys.stderr)
-                time.sleep(EFETCH_SLEEP_SECONDS)
+            print(f"[WARN] Could not write PubMed cache {cache_path}: {e}", file=sys.stderr)
 
-    # Assign pubmed_publication_types + final category (PubMed-first, then title)
+    # Assign pmid + pubmed_publication_types + final category (PubMed-first, then title)
     for it in deduped:
-        pmid = it.get("pmid")
-        pub_types = pmid_to_types.get(pmid, []) if pmid else []
-        it["pubmed_publication_types"] = pub_types
+        # Items carried over from the previous build keep their PubMed data unless the cache has newer
+        pmid, pub_types = pubmed.get(it.doi_norm) or (it.pmid, it.pubmed_publication_types)
+        it.pmid = pmid or None
+        it.pubmed_url = f"https://pubmed.ncbi.nlm.nih.gov/{pmid}/" if pmid else None
+        it.pubmed_publication_types = pub_types
 
         # Choose category with fallback title heuristics before Unclassified
-        it["category"] = choose_category(pub_types, it.get("title") or "")
-
-        # Normalize None fields (keep JSON clean)
-        if not pmid:
-            it.pop("pmid", None)
-            it.pop("pubmed_url", None)
+        it.category = choose_category(pub_types, it.title)
 
     # Hard cap output size
     if len(deduped) > GLOBAL_MAX_ITEMS:
         deduped = deduped[:GLOBAL_MAX_ITEMS]
 
-    out = {
-        "generated_at": iso_now(),
-        "items": deduped,
-        "meta": {
-            "rows_per_journal": CROSSREF_ROWS_PER_JOURNAL,
-            "global_max_items": GLOBAL_MAX_ITEMS,
-            "pmid_lookup_budget": PMID_LOOKUP_BUDGET,
-            "categories": DASHBOARD_CATEGORIES,
-        },
+    meta = {
+        "rows_per_journal": CROSSREF_ROWS_PER_JOURNAL,
+        "global_max_items": GLOBAL_MAX_ITEMS,
+        "pmid_lookup_budget": PMID_LOOKUP_BUDGET,
+        "categories": DASHBOARD_CATEGORIES,
+        "crossref_full_build": full_build,
+        "crossref_index_state": next_state,
+        "crossref_pub_window": next_windows,
     }
-
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(out, f, ensure_ascii=False, indent=2)
+    generated_at = iso_now()
+    write_data_json(out_path, generated_at, (it.to_json() for it in deduped), meta)
+    if DATA_NDJSON:
+        write_data_ndjson(os.path.join(root, "data.ndjson"), (it.to_json() for it in deduped))
+        write_bytes_atomic(
+            os.path.join(root, "data.meta.json"),
+            json_dumps_pretty({"generated_at": generated_at, "meta": meta}),
+        )
 
     print(
         f"Wrote {len(deduped)} items -> data.json "
         f"(rows/journal={CROSSREF_ROWS_PER_JOURNAL}, cap={GLOBAL_MAX_ITEMS}, "
-        f"pmid_budget={PMID_LOOKUP_BUDGET})"
+        f"pmid_budget={PMID_LOOKUP_BUDGET}, "
+        f"{'incremental' if previous else 'full'} Crossref fetch)"
     )
     return 0
 
@@ -20,14 +20,20 @@ from __future__ import annotations
 
 import csv
 import io
-import json
 import os
 import re
 import sys
-from datetime import datetime, timezone
 from typing import Dict, Any, Optional, Tuple, List
 
-import requests
+from _toc_common import (
+    iso_now,
+    json_dumps_pretty,
+    json_loads,
+    make_session,
+    normalize_issn,
+    source_issn,
+    write_bytes_atomic,
+)
 
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
@@ -48,23 +54,8 @@ UA = os.getenv(
 )
 TIMEOUT = 60
 
-
-def iso_now() -> str:
-    return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
-
-
-def normalize_issn(raw: str) -> str:
-    """
-    Normalize ISSN into ####-#### uppercase.
-    Accepts with/without hyphen.
-    """
-    s = (raw or "").strip().upper().replace(" ", "")
-    s = s.replace("–", "-")
-    if re.fullmatch(r"\d{4}-\d{3}[\dX]", s):
-        return s
-    if re.fullmatch(r"\d{7}[\dX]", s):
-        return s[:4] + "-" + s[4:]
-    return s
+# Both SJR downloads share one keep-alive session (retries on transient 429/5xx)
+SESSION = make_session(UA)
 
 
 def looks_like_html(text: str) -> bool:
@@ -73,14 +64,19 @@ def looks_like_html(text: str) -> bool:
 
 
 def fetch_text(url: str, headers: Dict[str, str]) -> str:
-    r = requests.get(url, headers=headers, timeout=TIMEOUT)
+    r = SESSION.get(url, headers=headers, timeout=TIMEOUT)
     r.raise_for_status()
+    # Whether the server actually compressed the (multi-MB) CSV; urllib3 decodes it transparently
+    print(f"[INFO] {url}: Content-Encoding={r.headers.get('Content-Encoding') or 'identity'}")
+    # Without a charset in Content-Type, r.text would run charset detection over the
+    # whole multi-MB download; both SJR sources are UTF-8
+    if r.encoding is None:
+        r.encoding = "utf-8"
     return r.text
 
 
 def fetch_scimago_export() -> str:
     headers = {
-        "User-Agent": UA,
         "Accept": "text/plain,text/csv,application/octet-stream,*/*",
         "Referer": "https://www.scimagojr.com/journalrank.php",
     }
@@ -89,7 +85,6 @@ def fetch_scimago_export() -> str:
 
 def fetch_fallback_csv() -> str:
     headers = {
-        "User-Agent": UA,
         "Accept": "text/csv,text/plain,*/*",
     }
     return fetch_text(SJR_FALLBACK_URL, headers=headers)
@@ -142,18 +137,15 @@ def parse_float(x: Any) -> Optional[float]:
 
 
 def load_sources() -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, Any]], set]:
-    with open(SOURCES_PATH, "r", encoding="utf-8") as f:
-        sources = json.load(f)
+    with open(SOURCES_PATH, "rb") as f:
+        sources = json_loads(f.read())
 
     # Map ISSN -> source record (short, name)
     issn_to_source: Dict[str, Dict[str, Any]] = {}
     wanted = set()
 
     for s in sources:
-        issn = s.get("issn")
-        if isinstance(issn, list):
-            issn = issn[0] if issn else ""
-        issn_norm = normalize_issn(str(issn))
+        issn_norm = source_issn(s)
         if not issn_norm:
             continue
         wanted.add(issn_norm)
@@ -174,33 +166,28 @@ def build_from_text(csv_text: str, wanted_issns: set) -> Tuple[int, Dict[str, Di
     reader = csv.DictReader(io.StringIO(csv_text), delimiter=delim)
     year_col, issn_col, sjr_col, title_col = detect_columns(reader.fieldnames or [])
 
-    rows = list(reader)
-
+    # One streaming pass: track the newest year seen while keeping matches for every
+    # year (only a handful of wanted ISSNs), then return the newest year's matches
     latest_year: Optional[int] = None
-    for r in rows:
-        try:
-            y = int((r.get(year_col) or "").strip())
-        except Exception:
-            continue
-        if latest_year is None or y > latest_year:
-            latest_year = y
-
-    if latest_year is None:
-        raise ValueError("Could not detect latest year")
+    per_year: Dict[int, Dict[str, Dict[str, Any]]] = {}
 
-    by_issn: Dict[str, Dict[str, Any]] = {}
+    # Cheap row prefilter: a cell holding a wanted ISSN still contains its 8 plain characters once
+    # spaces and dashes are dropped, so every other row skips the split/normalize/SJR parsing
+    wanted_re = re.compile("|".join(re.escape(w.replace("-", "")) for w in sorted(wanted_issns)) or r"(?!)")
 
-    for r in rows:
+    for r in reader:
         try:
             y = int((r.get(year_col) or "").strip())
         except Exception:
             continue
-        if y != latest_year:
-            continue
+        if latest_year is None or y > latest_year:
+            latest_year = y
 
         issn_raw = (r.get(issn_col) or "").strip()
         if not issn_raw:
             continue
+        if not wanted_re.search(issn_raw.upper().replace(" ", "").replace("-", "").replace("–", "")):
+            continue
 
         # Some datasets use comma-separated ISSNs
         issns = [normalize_issn(x) for x in issn_raw.split(",")]
@@ -214,10 +201,15 @@ def build_from_text(csv_text: str, wanted_issns: set) -> Tuple[int, Dict[str, Di
         for issn in issns:
             if issn in wanted_issns:
                 # keep max if duplicates
+                by_issn = per_year.setdefault(y, {})
                 cur = by_issn.get(issn)
                 if cur is None or float(cur.get("sjr", 0.0)) < sjr_val:
                     by_issn[issn] = {"sjr": sjr_val, "title_source": title_source}
 
+    if latest_year is None:
+        raise ValueError("Could not detect latest year")
+
+    by_issn = per_year.get(latest_year, {})
     return latest_year, by_issn
 
 
@@ -248,9 +240,8 @@ def main() -> int:
                 "by_issn": by_issn,
             }
 
-            # Write only after success
-            with open(OUT_PATH, "w", encoding="utf-8") as f:
-                json.dump(out, f, ensure_ascii=False, indent=2)
+            # Write only after success (atomically: a failed write keeps the old file)
+            write_bytes_atomic(OUT_PATH, json_dumps_pretty(out))
 
             print(f"[OK] {label}: wrote journal_metrics.json (year={latest_year}, matched={len(by_issn)}/{len(sources)})")
             return 0